@@ -1,24 +1,93 @@
 import datetime
+import errno
+import os
 import shutil
 from pathlib import Path
 
 from .config import BACKUP_DIR
 
+COPY_BUFFER_SIZE = 1 << 20
 
-def create_backup(file_path: Path) -> Path | None:
+# copy_file_range errors that mean "not supported here", as in shutil
+_COPY_FALLBACK_ERRNOS = frozenset(
+    {
+        errno.ENOSYS,
+        errno.EXDEV,
+        errno.EINVAL,
+        errno.EOPNOTSUPP,
+        errno.ENOTSUP,
+        errno.EPERM,
+        errno.ETXTBSY,
+    }
+)
+
+
+def _kernel_copy(src_fd: int, dst_fd: int, size: int) -> bool:
     """
-    Creates a timestamped backup of a file.
-    Returns the path to the backup, or None on failure.
+    Copies with copy_file_range until EOF.
+    Returns False if the filesystem doesn't support it and nothing was copied.
     """
+    count = max(size, COPY_BUFFER_SIZE)
     try:
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        backup_subdir = BACKUP_DIR / f"backup_{timestamp}"
-        backup_subdir.mkdir(parents=True, exist_ok=True)
+        # Some filesystems report EOF instead of failing
+        if not os.copy_file_range(src_fd, dst_fd, count):
+            return size == 0
+        while os.copy_file_range(src_fd, dst_fd, count):
+            pass
+    except OSError as e:
+        if e.errno not in _COPY_FALLBACK_ERRNOS:
+            raise
+        return False
+    return True
+
+
+def fast_copy(src: Path, dst: Path) -> None:
+    """
+    Copies a file and its metadata, like shutil.copy2.
+    Lets the kernel do the copy with copy_file_range (a reflink on CoW
+    filesystems), falling back to a buffered readinto loop.
+    """
+    src_fd = os.open(src, os.O_RDONLY)
+    try:
+        dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            if not _kernel_copy(src_fd, dst_fd, os.fstat(src_fd).st_size):
+                # Both offsets are shared with the fds, so the loop below
+                # picks up wherever copy_file_range stopped.
+                buffer = bytearray(COPY_BUFFER_SIZE)
+                view = memoryview(buffer)
+                with open(src_fd, "rb", buffering=0, closefd=False) as reader:
+                    while n := reader.readinto(buffer):
+                        os.write(dst_fd, view[:n])
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+    shutil.copystat(src, dst)
 
-        backup_path = backup_subdir / file_path.name
-        shutil.copy2(file_path, backup_path)
 
-        return backup_path
-    except Exception as e:
-        print(f"⚠️  Could not create backup for {file_path}: {e}")
+def create_backup(file_path: Path) -> Path | None:
+    """
+    Creates a timestamped backup of a file as a hard link to it, so callers
+    must replace the file rather than write into it.
+    Returns the path to the backup, or None if the file doesn't exist.
+    """
+    # A single lstat; the backup directory is only made for existing files
+    try:
+        os.lstat(file_path)
+    except FileNotFoundError:
         return None
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    backup_subdir = BACKUP_DIR / f"backup_{timestamp}"
+    backup_subdir.mkdir(parents=True, exist_ok=True)
+
+    backup_path = backup_subdir / file_path.name
+    try:
+        os.link(file_path, backup_path)
+    except OSError:
+        # Another filesystem, or one without hard links
+        fast_copy(file_path, backup_path)
+
+    return backup_path
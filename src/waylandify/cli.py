@@ -1,11 +1,13 @@
-import shutil
+import os
+import threading
 from pathlib import Path
-from typing_extensions import Annotated
+from typing import Annotated
 
 import typer
-from rich import print
 
-from . import config, discovery, desktop, backup
+from . import config
+
+# Anything only `apply` needs is imported inside it, to keep startup fast
 
 app = typer.Typer(
     help="A CLI tool to apply Wayland flags to Chromium-based applications."
@@ -20,6 +22,110 @@ def init():
     config.create_default_config()
 
 
+# One lock per target file, since programs may share desktop files
+_target_locks: dict[Path, threading.Lock] = {}
+
+
+def _process_program(
+    program_settings: config.ProgramSettings,
+    exec_index: dict[str, list[Path]],
+    user_desktop_dir: Path,
+    dry_run: bool,
+    stop: threading.Event,
+) -> tuple[list[str], bool]:
+    """
+    Applies the flags of a single program to its desktop files.
+    Stops writing once `stop` is set, and sets it on failure.
+    Returns the messages to print and whether it succeeded.
+    """
+    import shutil
+
+    from . import backup, desktop, discovery
+
+    messages = [f"[bold magenta]Processing '{program_settings.name}'...[/bold magenta]"]
+
+    exec_path = discovery.find_executable_path(program_settings.executables)
+    if not exec_path:
+        messages.append(
+            f"  [yellow]⚠️  Could not find executable for any of: {program_settings.executables}. Skipping.[/yellow]"
+        )
+        return messages, True
+
+    messages.append(f"  [dim]Found executable: {exec_path}[/dim]")
+
+    related_files = discovery.find_related_desktop_files(
+        program_settings.executables, exec_index
+    )
+
+    if not related_files:
+        messages.append("  [yellow]No related .desktop files found.[/yellow]")
+        return messages, True
+
+    for source_path in related_files:
+        target_path = user_desktop_dir / source_path.name
+        tmp_path = target_path.with_name(target_path.name + ".waylandify.tmp")
+        messages.append(f"  -> Found desktop file: [cyan]{source_path}[/cyan]")
+
+        try:
+            # Read, compare and replace under the target's lock, so a program
+            # sharing the file doesn't rewrite it from a stale copy
+            with _target_locks.setdefault(target_path, threading.Lock()):
+                try:
+                    modified_content = desktop.apply_flags_to_desktop_file(
+                        source_path, program_settings.flags
+                    )
+                except UnicodeDecodeError:
+                    messages.append("     [yellow]Not valid UTF-8, skipping.[/yellow]")
+                    continue
+
+                messages.append(f"     [bold]Target path:[/bold] {target_path}")
+                messages.append(
+                    f"     [bold]Flags to add:[/bold] {' '.join(program_settings.flags)}"
+                )
+
+                # Desktop files are UTF-8, whatever the locale
+                modified_bytes = modified_content.encode("utf-8")
+                try:
+                    up_to_date = target_path.read_bytes() == modified_bytes
+                except OSError:
+                    up_to_date = False
+
+                if up_to_date:
+                    messages.append("     [dim]Already up to date, skipping.[/dim]")
+                    continue
+
+                if stop.is_set():
+                    messages.append(
+                        "     [yellow]Skipped, another program failed.[/yellow]"
+                    )
+                    return messages, True
+
+                if not dry_run:
+                    tmp_path.write_bytes(modified_bytes)
+                    shutil.copymode(source_path, tmp_path)
+
+                    # The backup links the old inode, which the replace leaves intact
+                    try:
+                        backup.create_backup(target_path)
+                    except Exception as e:
+                        messages.append(
+                            f"     [yellow]⚠️  Could not create backup for {target_path}: {e}[/yellow]"
+                        )
+                    os.replace(tmp_path, target_path)
+                    messages.append(
+                        "     [green]✅ Applied flags successfully.[/green]"
+                    )
+
+        except Exception as e:
+            stop.set()
+            tmp_path.unlink(missing_ok=True)
+            messages.append(f"     [bold red]❌ Error applying flags: {e}[/bold red]")
+            return messages, False
+    messages.append("-" * 30)
+
+    return messages, True
+
+
 @app.command()
 def apply(
     dry_run: Annotated[
@@ -32,6 +138,11 @@ def apply(
     """
     Applies Wayland flags to the applications defined in the config file.
     """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from rich import print
+
+    from . import discovery
 
     if dry_run:
         print(
@@ -45,63 +156,49 @@ def apply(
 
     print("[bold blue]DEBUG: Loaded config:[/bold blue]", cfg)
 
-    all_desktop_files = discovery.get_all_desktop_files()
-    user_desktop_dir = Path.home() / ".local/share/applications"
+    exec_index = discovery.build_exec_index(discovery.get_all_desktop_files())
+    user_desktop_dir = config.USER_DESKTOP_DIR
 
     if not user_desktop_dir.exists() and not dry_run:
         user_desktop_dir.mkdir(parents=True, exist_ok=True)
 
     print("-" * 30)
 
-    # --- MODIFIED LOOP HERE ---
-    for program_settings in cfg.programs:
-        print(f"[bold magenta]Processing '{program_settings.name}'...[/bold magenta]")
-
-        exec_path = discovery.find_executable_path(program_settings.executables)
-        if not exec_path:
-            print(
-                f"  [yellow]⚠️  Could not find executable for any of: {program_settings.executables}. Skipping.[/yellow]"
+    stop = threading.Event()
+    failed = False
+    with ThreadPoolExecutor(max_workers=min(32, len(cfg.programs) or 1)) as executor:
+        futures = [
+            executor.submit(
+                _process_program,
+                program_settings,
+                exec_index,
+                user_desktop_dir,
+                dry_run,
+                stop,
             )
-            continue
-
-        print(f"  [dim]Found executable: {exec_path}[/dim]")
-
-        # We need to pass ProgramSettings to discovery now
-        related_files = discovery.find_related_desktop_files(
-            exec_path, program_settings.executables, all_desktop_files
-        )
-
-        if not related_files:
-            print("  [yellow]No related .desktop files found.[/yellow]")
-            continue
-
-        for source_path in related_files:
-            # ... (the rest of the file from here is mostly the same)
-            target_path = user_desktop_dir / source_path.name
-            print(f"  -> Found desktop file: [cyan]{source_path}[/cyan]")
-
-            modified_content = desktop.apply_flags_to_desktop_file(
-                source_path, program_settings.flags
-            )
-
-            print(f"     [bold]Target path:[/bold] {target_path}")
-            print(f"     [bold]Flags to add:[/bold] {' '.join(program_settings.flags)}")
-
-            if not dry_run:
-                try:
-                    if target_path.exists():
-                        backup.create_backup(target_path)
-
-                    if source_path != target_path:
-                        shutil.copy2(source_path, target_path)
-
-                    target_path.write_text(modified_content)
-                    print("     [green]✅ Applied flags successfully.[/green]")
-
-                except Exception as e:
-                    print(f"     [bold red]❌ Error applying flags: {e}[/bold red]")
-                    raise typer.Exit(code=1)
-        print("-" * 30)
+            for program_settings in cfg.programs
+        ]
+
+        # Print each program's output in config order once it's done
+        for program_settings, future in zip(cfg.programs, futures):
+            if future.cancelled():
+                print(
+                    f"[yellow]Skipped '{program_settings.name}' after an error.[/yellow]"
+                )
+                continue
+
+            messages, ok = future.result()
+            for message in messages:
+                print(message)
+
+            if not ok and not failed:
+                # Programs that haven't started yet don't run at all
+                failed = True
+                for pending in futures:
+                    pending.cancel()
+
+    if failed:
+        raise typer.Exit(code=1)
 
     if not dry_run:
         print("\n[bold green]✨ All operations completed successfully! ✨[/bold green]")
@@ -1,54 +1,66 @@
+import os
 from pathlib import Path
 
-import tomlkit
-from pydantic import BaseModel, ValidationError
-from rich import print
+import msgspec
 
-CONFIG_DIR = Path.home() / ".config" / "waylandify"
+_HOME = Path(os.environ.get("HOME") or os.path.expanduser("~"))
+
+CONFIG_DIR = _HOME / ".config" / "waylandify"
 CONFIG_FILE_PATH = CONFIG_DIR / "config.toml"
 BACKUP_DIR = CONFIG_DIR / "backups"
+USER_DESKTOP_DIR = _HOME / ".local/share/applications"
 
 
-class ProgramSettings(BaseModel):
+class ProgramSettings(msgspec.Struct):
     name: str
     executables: list[str]
     flags: list[str]
 
 
-class Config(BaseModel):
+class Config(msgspec.Struct):
     programs: list[ProgramSettings]
 
 
-DEFAULT_CONFIG = (Path(__file__).parent / "data" / "config.toml").read_text()
+# Importing this module must not touch the filesystem, since every
+# invocation (even --help) pays for it; read package data on demand instead.
+def _default_config() -> bytes:
+    from importlib.resources import files
+
+    return files(__package__).joinpath("data/config.toml").read_bytes()
 
 
 def create_default_config():
+    from rich import print
+
     if CONFIG_FILE_PATH.exists():
         print(f"[yellow]Configuration file already exists at:[/] {CONFIG_FILE_PATH}")
         return
     print(f"Creating default config at {CONFIG_FILE_PATH}...")
     try:
         CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-        CONFIG_FILE_PATH.write_text(DEFAULT_CONFIG)
+        CONFIG_FILE_PATH.write_bytes(_default_config())
         print("[green]✅ Successfully created configuration file.[/green]")
     except Exception as e:
         print(f"[bold red]❌ Error creating config file: {e}[/bold red]")
 
 
 def load_config() -> Config:
+    import tomllib
+
+    from rich import print
+
     if not CONFIG_FILE_PATH.is_file():
         print(
             f"[bold red]❌ Configuration file not found at {CONFIG_FILE_PATH}[/bold red]"
         )
         raise FileNotFoundError
     try:
-        data = tomlkit.parse(CONFIG_FILE_PATH.read_text())
-        return Config.model_validate(data)
-    except ValidationError as e:
+        with open(CONFIG_FILE_PATH, "rb") as f:
+            data = tomllib.load(f)
+        return msgspec.convert(data, type=Config)
+    except msgspec.ValidationError as e:
         print("[bold red]❌ Configuration file is invalid.[/bold red]")
-        for error in e.errors():
-            loc = " -> ".join(map(str, error["loc"]))
-            print(f"  - {loc}: {error['msg']}")
+        print(f"  - {e}")
         raise
     except Exception as e:
         print(f"[bold red]❌ Failed to load or parse config file: {e}[/bold red]")
@@ -1,7 +1,9 @@
-import configparser
-import io
+import re
 from pathlib import Path
 
+# Splits an Exec line into its key part and the command
+_EXEC_LINE_RE = re.compile(r"(?m)^([ \t]*Exec[ \t]*=[ \t]*)(.*)$")
+
 
 def add_flags_to_exec_command(exec_cmd: str, flags: list[str]) -> str:
     """
@@ -13,14 +15,17 @@ def add_flags_to_exec_command(exec_cmd: str, flags: list[str]) -> str:
 
     parts = exec_cmd.split()
 
+    # Common case: none of the flags are there yet, so insert them all
+    # after the executable without checking each argument
+    if flags and not any(flag in exec_cmd for flag in flags):
+        return " ".join([parts[0], *flags, *parts[1:]])
+
     executable = parts[0]
     original_args = parts[1:]
 
-    new_flags = []
-    # Only add flags that are not already present in the command
-    for flag in flags:
-        if flag not in exec_cmd:
-            new_flags.append(flag)
+    # Only add flags that are not already present as arguments
+    existing = set(original_args)
+    new_flags = [flag for flag in flags if flag not in existing]
 
     # Reconstruct the command: executable + new_flags + original_args
     final_parts = [executable] + new_flags + original_args
@@ -29,33 +34,10 @@ def add_flags_to_exec_command(exec_cmd: str, flags: list[str]) -> str:
 
 def apply_flags_to_desktop_file(path: Path, flags: list[str]) -> str:
     """
-    Parses a .desktop file, applies flags to all Exec keys, and returns the new content.
+    Applies flags to all Exec keys of a .desktop file and returns the new content.
+    Everything else (comments, blank lines, shebangs) is kept as is.
     """
-    parser = configparser.ConfigParser(
-        delimiters=("="),
-        interpolation=None,
-        allow_no_value=True,  # Makes parsing more robust for .desktop files
+    return _EXEC_LINE_RE.sub(
+        lambda m: m.group(1) + add_flags_to_exec_command(m.group(2), flags),
+        path.read_text(encoding="utf-8"),
     )
-    # Preserve the case of keys
-    parser.optionxform = str
-
-    content = path.read_text()
-
-    # Some .desktop files (especially PWAs) start with a shebang.
-    # configparser sees this as an error. We must filter it out before parsing.
-    if content.startswith("#!"):
-        content = "\n".join(content.splitlines()[1:])
-
-    parser.read_string(content)
-
-    # Apply flags to all 'Exec' entries in every section
-    for section in parser.sections():
-        if parser.has_option(section, "Exec"):
-            original_exec = parser.get(section, "Exec")
-            modified_exec = add_flags_to_exec_command(original_exec, flags)
-            parser.set(section, "Exec", modified_exec)
-
-    # Write the modified configuration to a string
-    string_io = io.StringIO()
-    parser.write(string_io, space_around_delimiters=False)
-    return string_io.getvalue().strip()
@@ -1,14 +1,29 @@
+import functools
+import mmap
+import os
+import re
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from .config import USER_DESKTOP_DIR
 
 # Standard directories where .desktop files are stored
 DESKTOP_FILE_DIRS = [
     Path("/usr/share/applications"),
     Path("/usr/local/share/applications"),
-    Path.home() / ".local/share/applications",
+    USER_DESKTOP_DIR,
 ]
 
+# Captures the executable's basename of every Exec= line in a .desktop file
+_EXEC_RE = re.compile(rb"(?m)^[ \t]*Exec=[ \t]*(?:\S*/)?(\S+)")
+
+# Files larger than this are scanned through mmap instead of being read
+MMAP_THRESHOLD = 8192
+
+# PATH lookups are shared by every program, so only do each one once
+_which = functools.cache(shutil.which)
+
 
 def find_executable_path(names: list[str]) -> str | None:
     """
@@ -16,7 +31,7 @@ def find_executable_path(names: list[str]) -> str | None:
     Returns the first one found, or None.
     """
     for name in names:
-        path = shutil.which(name)
+        path = _which(name)
         if path:
             return path
     return None
@@ -26,42 +41,65 @@ def get_all_desktop_files() -> list[Path]:
     """Scans standard directories and returns a list of all .desktop files."""
     all_files = []
     for directory in DESKTOP_FILE_DIRS:
-        if directory.is_dir():
-            all_files.extend(directory.glob("*.desktop"))
+        # Let scandir fail rather than stat'ing each directory upfront
+        try:
+            entries = os.scandir(directory)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+        with entries:
+            all_files.extend(
+                Path(entry.path)
+                for entry in entries
+                if entry.name.endswith(".desktop") and entry.is_file()
+            )
     return all_files
 
 
-# src/waylandify/discovery.py
-# ... (imports and first two functions are fine)
+def read_exec_names(path: Path) -> list[bytes] | None:
+    """
+    Returns the executable basenames of all Exec keys in a .desktop file,
+    or None if it can't be read.
+    Large files are scanned through mmap instead of being read into memory.
+    """
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    return _EXEC_RE.findall(buffer)
+            return _EXEC_RE.findall(f.read())
+    except (OSError, ValueError):
+        return None
 
 
-def find_related_desktop_files(
-    exec_path: str,
-    executables: list[str],  # Changed this parameter
-    all_desktop_files: list[Path],
-) -> list[Path]:
+def read_all_exec_names(paths: list[Path]) -> dict[Path, list[bytes]]:
     """
-    Finds all .desktop files that reference the given program.
-    This simulates a `grep` for the executable name/aliases in all .desktop files.
+    Reads the Exec basenames of all the given .desktop files concurrently.
+    Files that can't be read are left out of the result.
     """
-    found_files: set[Path] = set()
-    search_terms = set(executables)  # Use the list directly
+    with ThreadPoolExecutor() as executor:
+        results = executor.map(read_exec_names, paths)
+        return {path: names for path, names in zip(paths, results) if names is not None}
+
+
+def build_exec_index(all_desktop_files: list[Path]) -> dict[str, list[Path]]:
+    """
+    Scans all .desktop files once and maps every executable name found in
+    their Exec keys to the files that use it.
+    """
+    index: dict[str, list[Path]] = {}
+    for desktop_file, names in read_all_exec_names(all_desktop_files).items():
+        for name in set(names):
+            index.setdefault(name.decode("utf-8", "replace"), []).append(desktop_file)
+    return index
 
-    for desktop_file in all_desktop_files:
-        try:
-            content = desktop_file.read_text()
-            for line in content.splitlines():
-                line = line.strip()
-                if line.startswith("Exec="):
-                    command_str = line.split("=", 1)[1].strip()
-                    if not command_str:
-                        continue  # Handle empty Exec=
-                    executable_in_file = command_str.split()[0]
-
-                    if Path(executable_in_file).name in search_terms:
-                        found_files.add(desktop_file)
-                        break
-        except (IOError, UnicodeDecodeError):
-            continue
 
-    return list(found_files)
+def find_related_desktop_files(
+    executables: list[str],
+    exec_index: dict[str, list[Path]],
+) -> list[Path]:
+    """
+    Finds all .desktop files that reference any of the given executable names.
+    """
+    return list(
+        dict.fromkeys(path for name in executables for path in exec_index.get(name, []))
+    )